@@ -1,14 +1,23 @@
+import asyncio
+import hashlib
 import logging
 import os
-import json
 import secrets
 import string
+import time
 import re as _re
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 from pathlib import Path
-from fastapi import FastAPI, HTTPException
+from typing import Iterator
+import msgspec
+import orjson
+from fastapi import BackgroundTasks, FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.middleware.gzip import GZipMiddleware
+from pydantic import BaseModel, ConfigDict
 from livekit import api
 from mistralai import Mistral
 from dotenv import load_dotenv
@@ -23,7 +32,64 @@ logger.setLevel(logging.INFO)
 
 _DATA_DIR = Path(__file__).resolve().parent / "data"
 
-app = FastAPI(title="Beat Your Meet API")
+# Read once at import; request handlers never touch os.environ.
+_MISTRAL_API_KEY = os.environ.get("MISTRAL_API_KEY", "")
+_LK_URL = os.environ.get("LIVEKIT_URL", "")
+_LK_KEY = os.environ.get("LIVEKIT_API_KEY", "")
+_LK_SECRET = os.environ.get("LIVEKIT_API_SECRET", "")
+
+mistral_client = Mistral(api_key=_MISTRAL_API_KEY)
+
+# One LiveKit API client per process so its HTTP session (and the TLS
+# connection behind it) is reused across requests instead of rebuilt per call.
+_lk_api: api.LiveKitAPI | None = None
+
+
+def _get_lk_api() -> api.LiveKitAPI:
+    """Return the shared LiveKit API client, creating it on first use."""
+    global _lk_api
+    if _lk_api is None:
+        _lk_api = api.LiveKitAPI(_LK_URL, _LK_KEY, _LK_SECRET)
+    return _lk_api
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    global _lk_api
+    # Fail at boot rather than on the first room/token request
+    missing = [
+        name
+        for name, value in (
+            ("LIVEKIT_URL", _LK_URL),
+            ("LIVEKIT_API_KEY", _LK_KEY),
+            ("LIVEKIT_API_SECRET", _LK_SECRET),
+        )
+        if not value
+    ]
+    if missing:
+        raise RuntimeError(f"Server misconfigured: missing {', '.join(missing)}")
+    try:
+        yield
+    finally:
+        if _lk_api is not None:
+            await _lk_api.aclose()
+            _lk_api = None
+
+
+class _GZipExceptRawDocs(GZipMiddleware):
+    """GZip responses except /raw doc bodies, which stream from disk untouched."""
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "http" and scope["path"].endswith("/raw"):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+app = FastAPI(title="Beat Your Meet API", lifespan=_lifespan)
+
+# Doc listings and JSON doc bodies are plain text and compress well
+app.add_middleware(_GZipExceptRawDocs, minimum_size=1024, compresslevel=5)
 
 app.add_middleware(
     CORSMiddleware,
@@ -32,60 +98,68 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-mistral_client = Mistral(api_key=os.environ.get("MISTRAL_API_KEY", ""))
-
 
 # ── Models ────────────────────────────────────────────────────────────
 
 
-class TokenRequest(BaseModel):
+class _RequestModel(BaseModel):
+    # Stricter contract on purpose: a request carrying fields the endpoint
+    # doesn't define is rejected with a 422 instead of having them silently
+    # dropped, so client typos and stale fields surface immediately.
+    model_config = ConfigDict(extra="forbid")
+
+
+class TokenRequest(_RequestModel):
     room_name: str
     participant_name: str
     access_code: str
 
 
-class AgendaRequest(BaseModel):
+class AgendaRequest(_RequestModel):
     description: str
     duration_minutes: int
 
 
-class CreateRoomRequest(BaseModel):
+class CreateRoomRequest(_RequestModel):
     agenda: dict
     style: str  # "gentle" | "moderate" | "chatting"
     invite_bot: bool = True
 
 
-class BotControlRequest(BaseModel):
+class BotControlRequest(_RequestModel):
     host_token: str
 
 
-class UploadDocRequest(BaseModel):
+class UploadDocRequest(_RequestModel):
     filename: str
     title: str
     content: str
 
 
-class DocMeta(BaseModel):
-    filename: str
-    title: str
-    size_bytes: int
-    created_at: str
-
-
-_ROOM_ID_RE = _re.compile(r"^meet-[a-f0-9]{8}$")
-_FILENAME_RE = _re.compile(r"^[a-z0-9][a-z0-9-]{0,58}\.md$")
+_ROOM_ID_HEX = frozenset("0123456789abcdef")
+_FILENAME_RE = _re.compile(r"[a-z0-9][a-z0-9-]{0,58}\.md")
+_FILENAME_MAX_LEN = 62
 
 
 def _safe_room_dir(room_id: str) -> Path:
     """Validate room_id and return its data directory. Raises 400 on invalid input."""
-    if not _ROOM_ID_RE.match(room_id):
+    # Fixed shape "meet-" + 8 lowercase hex chars; checked by hand, no regex
+    if (
+        len(room_id) != 13
+        or not room_id.startswith("meet-")
+        or not _ROOM_ID_HEX.issuperset(room_id[5:])
+    ):
         raise HTTPException(status_code=400, detail="Invalid room_id format")
     return _DATA_DIR / "rooms" / room_id
 
 
 def _safe_doc_path(room_id: str, filename: str) -> Path:
     """Validate both room_id and filename, return the full path."""
-    if not _FILENAME_RE.match(filename):
+    if (
+        len(filename) > _FILENAME_MAX_LEN
+        or not filename.endswith(".md")
+        or not _FILENAME_RE.fullmatch(filename)
+    ):
         raise HTTPException(status_code=400, detail="Invalid filename format")
     return _safe_room_dir(room_id) / filename
 
@@ -93,31 +167,70 @@ def _safe_doc_path(room_id: str, filename: str) -> Path:
 # ── Token Generation ─────────────────────────────────────────────────
 
 
+class RoomMeta(msgspec.Struct):
+    """Fields the server reads from LiveKit room metadata.
+
+    Unknown keys are ignored on decode, so this is a read-only view: code that
+    writes metadata back must edit the raw JSON (see invite_bot) rather than
+    re-encode a RoomMeta, or it would drop keys other writers added.
+    """
+
+    agenda: dict = msgspec.field(default_factory=dict)
+    style: str = ""
+    access_code: str = ""
+    host_token: str = ""
+    invite_bot: bool = False
+
+
+# Decode straight into RoomMeta without an intermediate dict
+_ROOM_META_DECODER = msgspec.json.Decoder(RoomMeta)
+_ROOM_META_ENCODER = msgspec.json.Encoder()
+
+# Short-lived cache of parsed room metadata. Token checks and host actions
+# for the same room tend to arrive in bursts; the TTL bounds staleness.
+_ROOM_META_TTL = 5.0
+_room_meta_cache: dict[str, tuple[float, RoomMeta]] = {}
+
+
+async def _get_room_meta(room_name: str) -> RoomMeta | None:
+    """Return the room's parsed metadata, or None if the room does not exist."""
+    now = time.monotonic()
+    cached = _room_meta_cache.get(room_name)
+    if cached is not None and now - cached[0] < _ROOM_META_TTL:
+        return cached[1]
+
+    rooms = await _get_lk_api().room.list_rooms(api.ListRoomsRequest(names=[room_name]))
+    if not rooms.rooms:
+        _room_meta_cache.pop(room_name, None)
+        return None
+    try:
+        metadata = _ROOM_META_DECODER.decode(rooms.rooms[0].metadata or "{}")
+    except msgspec.DecodeError as e:  # also covers ValidationError
+        logger.error(f"Malformed metadata for room {room_name}: {e}")
+        raise HTTPException(status_code=502, detail="Room metadata is malformed")
+    # Drop expired entries so rooms that are never looked up again don't pile up
+    for name in [n for n, (ts, _) in _room_meta_cache.items() if now - ts >= _ROOM_META_TTL]:
+        del _room_meta_cache[name]
+    _room_meta_cache[room_name] = (now, metadata)
+    return metadata
+
+
 @app.post("/api/token")
 async def generate_token(req: TokenRequest):
     try:
         # Validate access code against room metadata
-        lk_api = api.LiveKitAPI(
-            os.environ["LIVEKIT_URL"],
-            os.environ["LIVEKIT_API_KEY"],
-            os.environ["LIVEKIT_API_SECRET"],
-        )
-        try:
-            rooms = await lk_api.room.list_rooms(api.ListRoomsRequest(names=[req.room_name]))
-            if not rooms.rooms:
-                raise HTTPException(status_code=404, detail="Room not found or has ended")
-            room_metadata = json.loads(rooms.rooms[0].metadata or "{}")
-            stored_code = room_metadata.get("access_code", "")
-            if stored_code.upper() != req.access_code.upper():
-                logger.warning(f"Invalid access code attempt for room: {req.room_name}")
-                raise HTTPException(status_code=403, detail="Invalid access code")
-        finally:
-            await lk_api.aclose()
-
-        token = api.AccessToken(
-            os.environ["LIVEKIT_API_KEY"],
-            os.environ["LIVEKIT_API_SECRET"],
-        )
+        room_metadata = await _get_room_meta(req.room_name)
+        if room_metadata is None:
+            raise HTTPException(status_code=404, detail="Room not found or has ended")
+        stored_code = room_metadata.access_code
+        # Codes are generated uppercase, so only the supplied one needs
+        # normalizing. Compare bytes: compare_digest rejects non-ASCII str.
+        supplied_code = req.access_code.upper()
+        if not secrets.compare_digest(stored_code.encode(), supplied_code.encode()):
+            logger.warning(f"Invalid access code attempt for room: {req.room_name}")
+            raise HTTPException(status_code=403, detail="Invalid access code")
+
+        token = api.AccessToken(_LK_KEY, _LK_SECRET)
         token.with_identity(req.participant_name)
         token.with_name(req.participant_name)
         token.with_grants(
@@ -132,9 +245,6 @@ async def generate_token(req: TokenRequest):
         return {"token": token.to_jwt()}
     except HTTPException:
         raise
-    except KeyError as e:
-        logger.error(f"Missing env var for token generation: {e}")
-        raise HTTPException(status_code=500, detail=f"Server misconfigured: missing {e}")
     except Exception as e:
         logger.exception("Token generation failed")
         raise HTTPException(status_code=500, detail=str(e))
@@ -143,134 +253,261 @@ async def generate_token(req: TokenRequest):
 # ── Agenda Generation ────────────────────────────────────────────────
 
 
-AGENDA_GENERATION_PROMPT = """Based on the meeting description below, generate a structured agenda.
-
-Meeting Description:
-{description}
+# The static instructions are sent first and byte-for-byte identical on every
+# call so Mistral's automatic prefix caching can reuse them; only the short
+# user message from _render_agenda_prompt varies per request.
+AGENDA_STATIC_PREFIX = """You are a meeting planning assistant. Generate structured agendas in JSON format. Only output valid JSON.
 
-Total meeting duration: {duration_minutes} minutes
+Based on the meeting description provided by the user, generate a structured agenda.
 
 Generate a JSON object with this exact structure:
-{{
+{
   "title": "Meeting title",
   "items": [
-    {{
+    {
       "id": 1,
       "topic": "Topic name",
       "description": "Brief description of what to cover",
       "duration_minutes": 10
-    }}
+    }
   ],
-  "total_minutes": {duration_minutes}
-}}
+  "total_minutes": <total meeting duration in minutes>
+}
 
 Rules:
-- Keep the total duration of all items within {duration_minutes} minutes
+- Keep the total duration of all items within the total meeting duration
 - Each item should have a clear, concise topic name
 - Order items by priority (most important first)
 - Be realistic about time — discussion takes longer than you think
 - Aim for 3-6 items depending on the total duration
+
+Example 1
+Meeting Description:
+Weekly engineering standup: blockers, what shipped, and what's next.
+Total meeting duration: 15 minutes
+Output:
+{"title": "Weekly Engineering Standup", "items": [{"id": 1, "topic": "Blockers", "description": "Surface anything preventing progress and assign owners", "duration_minutes": 5}, {"id": 2, "topic": "Shipped this week", "description": "Quick round of what went out", "duration_minutes": 5}, {"id": 3, "topic": "Next up", "description": "Confirm priorities for the coming week", "duration_minutes": 5}], "total_minutes": 15}
+
+Example 2
+Meeting Description:
+Q3 planning kickoff with product and design. Review last quarter's results, agree on goals, and draft the roadmap.
+Total meeting duration: 60 minutes
+Output:
+{"title": "Q3 Planning Kickoff", "items": [{"id": 1, "topic": "Agree on Q3 goals", "description": "Settle the top objectives and how success is measured", "duration_minutes": 25}, {"id": 2, "topic": "Draft roadmap", "description": "Sequence the major projects against the goals", "duration_minutes": 20}, {"id": 3, "topic": "Q2 results review", "description": "Key wins, misses, and lessons learned", "duration_minutes": 10}, {"id": 4, "topic": "Owners and next steps", "description": "Assign owners and follow-ups", "duration_minutes": 5}], "total_minutes": 60}
 """
 
 
-@app.post("/api/agenda")
-async def generate_agenda(req: AgendaRequest):
-    if not os.environ.get("MISTRAL_API_KEY"):
-        raise HTTPException(status_code=500, detail="MISTRAL_API_KEY not configured")
+def _render_agenda_prompt(description: str, duration_minutes: int) -> str:
+    """Build the per-request user message that follows the static prefix."""
+    return (
+        f"Meeting Description:\n{description}\n\n"
+        f"Total meeting duration: {duration_minutes} minutes\n"
+    )
 
-    try:
-        response = await mistral_client.chat.complete_async(
-            model="mistral-large-latest",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a meeting planning assistant. Generate structured agendas in JSON format. Only output valid JSON.",
-                },
-                {
-                    "role": "user",
-                    "content": AGENDA_GENERATION_PROMPT.format(
-                        description=req.description,
-                        duration_minutes=req.duration_minutes,
-                    ),
-                },
-            ],
-            response_format={"type": "json_object"},
-            temperature=0.3,
-            max_tokens=1024,
-        )
 
-        agenda = json.loads(response.choices[0].message.content)
-        return agenda
-    except json.JSONDecodeError as e:
+_AGENDA_CACHE_MAX = 1000
+_AGENDA_CACHE_TTL_SECONDS = 24 * 3600
+_agenda_cache: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+
+
+def _agenda_cache_key(description: str, duration_minutes: int) -> str:
+    normalized = f"{description.strip().lower()}|{duration_minutes}"
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def _scan_json_object(text: str, state: list) -> int:
+    """Advance a brace-matching scan over a streamed chunk.
+
+    ``state`` is ``[depth, in_string, escaped, started]`` and is updated in
+    place so the scan resumes where the previous chunk stopped. Returns the
+    offset just past the closing brace of the top-level object, or -1.
+    """
+    depth, in_string, escaped, started = state
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == "{":
+            depth += 1
+            started = True
+        elif ch == "}":
+            depth -= 1
+            if started and depth == 0:
+                state[:] = [depth, in_string, escaped, started]
+                return i + 1
+    state[:] = [depth, in_string, escaped, started]
+    return -1
+
+
+async def _call_mistral_for_agenda(description: str, duration_minutes: int) -> dict:
+    # Stream the completion and stop reading as soon as the top-level JSON
+    # object closes, instead of waiting for the model to finish the response.
+    stream = await mistral_client.chat.stream_async(
+        model="mistral-small-latest",
+        messages=[
+            {"role": "system", "content": AGENDA_STATIC_PREFIX},
+            {
+                "role": "user",
+                "content": _render_agenda_prompt(description, duration_minutes),
+            },
+        ],
+        response_format={"type": "json_object"},
+        temperature=0.3,
+        max_tokens=512,
+    )
+    parts: list[str] = []
+    scan_state = [0, False, False, False]
+    async with stream:
+        async for chunk in stream:
+            # Usage-only and keep-alive chunks can arrive with no choices
+            choices = chunk.data.choices
+            if not choices:
+                continue
+            delta = choices[0].delta.content
+            if not isinstance(delta, str) or not delta:
+                continue
+            end = _scan_json_object(delta, scan_state)
+            if end != -1:
+                parts.append(delta[:end])
+                break
+            parts.append(delta)
+    return orjson.loads("".join(parts))
+
+
+def _agenda_cache_get(key: str) -> dict | None:
+    entry = _agenda_cache.get(key)
+    if entry is None:
+        return None
+    stored_at, agenda = entry
+    if time.monotonic() - stored_at > _AGENDA_CACHE_TTL_SECONDS:
+        del _agenda_cache[key]
+        return None
+    _agenda_cache.move_to_end(key)
+    return agenda
+
+
+def _agenda_cache_store(key: str, agenda: dict) -> None:
+    _agenda_cache[key] = (time.monotonic(), agenda)
+    _agenda_cache.move_to_end(key)
+    if len(_agenda_cache) > _AGENDA_CACHE_MAX:
+        _agenda_cache.popitem(last=False)
+
+
+async def _generate_and_cache_agenda(key: str, description: str, duration_minutes: int) -> dict:
+    try:
+        agenda = await _call_mistral_for_agenda(description, duration_minutes)
+    except orjson.JSONDecodeError as e:
         logger.error(f"Mistral returned invalid JSON for agenda: {e}")
         raise HTTPException(status_code=502, detail="LLM returned invalid JSON")
     except Exception as e:
         logger.exception("Agenda generation failed")
         raise HTTPException(status_code=502, detail=f"Agenda generation failed: {e}")
 
+    _agenda_cache_store(key, agenda)
+    return agenda
+
+
+# Concurrent requests for the same agenda share one in-flight generation
+# rather than each opening its own Mistral call.
+_agenda_inflight: dict[str, asyncio.Task] = {}
+
+
+@app.post("/api/agenda")
+async def generate_agenda(req: AgendaRequest):
+    if not _MISTRAL_API_KEY:
+        raise HTTPException(status_code=500, detail="MISTRAL_API_KEY not configured")
+
+    # Identical (description, duration) pairs are served from memory
+    key = _agenda_cache_key(req.description, req.duration_minutes)
+    cached = _agenda_cache_get(key)
+    if cached is not None:
+        return cached
+
+    task = _agenda_inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(
+            _generate_and_cache_agenda(key, req.description, req.duration_minutes)
+        )
+        _agenda_inflight[key] = task
+        task.add_done_callback(lambda _: _agenda_inflight.pop(key, None))
+    # Shield so one client disconnecting doesn't cancel the others' result
+    return await asyncio.shield(task)
+
 
 # ── Room Creation ────────────────────────────────────────────────────
 
 
+_CODE_ALPHABET = tuple(string.ascii_uppercase + string.digits)
+_CODE_BASE = len(_CODE_ALPHABET)
+_CODE_SPACE = _CODE_BASE**4
+
+
 def generate_access_code() -> str:
-    chars = string.ascii_uppercase + string.digits
-    code = "".join(secrets.choice(chars) for _ in range(4))
-    return f"MEET-{code}"
+    # A single unbiased draw covers all four characters (one urandom call
+    # instead of four secrets.choice calls).
+    a = _CODE_ALPHABET
+    n = secrets.randbelow(_CODE_SPACE)
+    n, i0 = divmod(n, _CODE_BASE)
+    n, i1 = divmod(n, _CODE_BASE)
+    i3, i2 = divmod(n, _CODE_BASE)
+    return f"MEET-{a[i0]}{a[i1]}{a[i2]}{a[i3]}"
 
 
-@app.post("/api/room")
-async def create_room(req: CreateRoomRequest):
-    import uuid
+async def _dispatch_bot(room_name: str) -> None:
+    try:
+        await _get_lk_api().agent_dispatch.create_dispatch(
+            api.CreateAgentDispatchRequest(
+                agent_name="beat-facilitator",
+                room=room_name,
+            )
+        )
+        logger.info(f"Dispatched bot to room: {room_name}")
+    except Exception:
+        logger.exception(f"Bot dispatch failed for room: {room_name}")
 
+
+@app.post("/api/room")
+async def create_room(req: CreateRoomRequest, background_tasks: BackgroundTasks):
     logger.info(f"create_room called — invite_bot={req.invite_bot}, style={req.style}")
-    room_name = f"meet-{uuid.uuid4().hex[:8]}"
+    room_name = f"meet-{secrets.token_hex(4)}"
     access_code = generate_access_code()
     host_token = secrets.token_hex(16)
 
     # Store room metadata (agenda + style + access code + host token) in LiveKit room metadata.
     # Include invite_bot so the agent can check whether it should accept the job.
-    room_metadata = json.dumps(
-        {
-            "agenda": req.agenda,
-            "style": req.style,
-            "access_code": access_code,
-            "host_token": host_token,
-            "invite_bot": req.invite_bot,
-        }
-    )
+    room_metadata = _ROOM_META_ENCODER.encode(
+        RoomMeta(
+            agenda=req.agenda,
+            style=req.style,
+            access_code=access_code,
+            host_token=host_token,
+            invite_bot=req.invite_bot,
+        )
+    ).decode()
 
     try:
-        lk_api = api.LiveKitAPI(
-            os.environ["LIVEKIT_URL"],
-            os.environ["LIVEKIT_API_KEY"],
-            os.environ["LIVEKIT_API_SECRET"],
-        )
-        try:
-            await lk_api.room.create_room(
-                api.CreateRoomRequest(
-                    name=room_name,
-                    metadata=room_metadata,
-                )
+        await _get_lk_api().room.create_room(
+            api.CreateRoomRequest(
+                name=room_name,
+                metadata=room_metadata,
             )
-
-            # Only explicitly dispatch the agent when the host opted in
-            if req.invite_bot:
-                await lk_api.agent_dispatch.create_dispatch(
-                    api.CreateAgentDispatchRequest(
-                        agent_name="beat-facilitator",
-                        room=room_name,
-                    )
-                )
-                logger.info(f"Dispatched bot to room: {room_name}")
-        finally:
-            await lk_api.aclose()
-    except KeyError as e:
-        logger.error(f"Missing env var for room creation: {e}")
-        raise HTTPException(status_code=500, detail=f"Server misconfigured: missing {e}")
+        )
     except Exception as e:
         logger.exception("Room creation failed")
         raise HTTPException(status_code=502, detail=f"Failed to create LiveKit room: {e}")
 
+    # Only explicitly dispatch the agent when the host opted in. The client
+    # doesn't need the dispatch result, so it runs after the response is sent;
+    # the host can still re-invite from the room if it fails.
+    if req.invite_bot:
+        background_tasks.add_task(_dispatch_bot, room_name)
+
     logger.info(f"Created room: {room_name} with access code: {access_code}")
     return {"room_name": room_name, "access_code": access_code, "host_token": host_token}
 
@@ -280,21 +517,12 @@ async def create_room(req: CreateRoomRequest):
 
 async def _verify_host_token(room_name: str, host_token: str) -> None:
     """Verify that the provided host_token matches the one stored in room metadata."""
-    lk_api = api.LiveKitAPI(
-        os.environ["LIVEKIT_URL"],
-        os.environ["LIVEKIT_API_KEY"],
-        os.environ["LIVEKIT_API_SECRET"],
-    )
-    try:
-        rooms = await lk_api.room.list_rooms(api.ListRoomsRequest(names=[room_name]))
-        if not rooms.rooms:
-            raise HTTPException(status_code=404, detail="Room not found")
-        room_metadata = json.loads(rooms.rooms[0].metadata or "{}")
-        stored_token = room_metadata.get("host_token", "")
-        if not secrets.compare_digest(stored_token, host_token):
-            raise HTTPException(status_code=403, detail="Invalid host token")
-    finally:
-        await lk_api.aclose()
+    room_metadata = await _get_room_meta(room_name)
+    if room_metadata is None:
+        raise HTTPException(status_code=404, detail="Room not found")
+    stored_token = room_metadata.host_token
+    if not secrets.compare_digest(stored_token, host_token):
+        raise HTTPException(status_code=403, detail="Invalid host token")
 
 
 @app.post("/api/room/{room_name}/invite-bot")
@@ -302,39 +530,45 @@ async def invite_bot(room_name: str, req: BotControlRequest):
     logger.info(f"invite-bot called for room={room_name}, host_token={'present' if req.host_token else 'missing'}")
     await _verify_host_token(room_name, req.host_token)
 
-    lk_api = api.LiveKitAPI(
-        os.environ["LIVEKIT_URL"],
-        os.environ["LIVEKIT_API_KEY"],
-        os.environ["LIVEKIT_API_SECRET"],
+    lk_api = _get_lk_api()
+    # The participant check and the metadata read are independent, so issue
+    # them together. The read bypasses the metadata cache: it feeds a
+    # read-modify-write, which must start from the room's current state.
+    participants, rooms = await asyncio.gather(
+        lk_api.room.list_participants(api.ListParticipantsRequest(room=room_name)),
+        lk_api.room.list_rooms(api.ListRoomsRequest(names=[room_name])),
     )
-    try:
-        # Check if bot is already in the room
-        participants = await lk_api.room.list_participants(
-            api.ListParticipantsRequest(room=room_name)
-        )
-        for p in participants.participants:
-            if p.identity == "beat-facilitator":
-                return {"status": "already_active"}
-
-        # Update room metadata to set invite_bot=True so the agent's
-        # request_fnc will accept the job.
-        rooms = await lk_api.room.list_rooms(api.ListRoomsRequest(names=[room_name]))
-        if rooms.rooms:
-            metadata = json.loads(rooms.rooms[0].metadata or "{}")
+
+    # Check if bot is already in the room
+    for p in participants.participants:
+        if p.identity == "beat-facilitator":
+            return {"status": "already_active"}
+
+    # Update room metadata to set invite_bot=True so the agent's
+    # request_fnc will accept the job. This must land before the dispatch,
+    # so the two stay sequential. Edit the raw dict so keys RoomMeta does not
+    # know about survive the round trip.
+    if rooms.rooms:
+        try:
+            metadata = orjson.loads(rooms.rooms[0].metadata or "{}")
+        except orjson.JSONDecodeError:
+            metadata = None
+        if not isinstance(metadata, dict):
+            raise HTTPException(status_code=502, detail="Room metadata is malformed")
+        if not metadata.get("invite_bot"):
             metadata["invite_bot"] = True
             await lk_api.room.update_room_metadata(
-                api.UpdateRoomMetadataRequest(room=room_name, metadata=json.dumps(metadata))
+                api.UpdateRoomMetadataRequest(room=room_name, metadata=orjson.dumps(metadata).decode())
             )
+            _room_meta_cache.pop(room_name, None)
 
-        # Dispatch the agent
-        await lk_api.agent_dispatch.create_dispatch(
-            api.CreateAgentDispatchRequest(
-                agent_name="beat-facilitator",
-                room=room_name,
-            )
+    # Dispatch the agent
+    await lk_api.agent_dispatch.create_dispatch(
+        api.CreateAgentDispatchRequest(
+            agent_name="beat-facilitator",
+            room=room_name,
         )
-    finally:
-        await lk_api.aclose()
+    )
 
     logger.info(f"Invited bot to room: {room_name}")
     return {"status": "invited"}
@@ -344,11 +578,7 @@ async def invite_bot(room_name: str, req: BotControlRequest):
 async def remove_bot(room_name: str, req: BotControlRequest):
     await _verify_host_token(room_name, req.host_token)
 
-    lk_api = api.LiveKitAPI(
-        os.environ["LIVEKIT_URL"],
-        os.environ["LIVEKIT_API_KEY"],
-        os.environ["LIVEKIT_API_SECRET"],
-    )
+    lk_api = _get_lk_api()
     try:
         await lk_api.room.remove_participant(
             api.RoomParticipantIdentity(room=room_name, identity="beat-facilitator")
@@ -356,8 +586,6 @@ async def remove_bot(room_name: str, req: BotControlRequest):
     except Exception as e:
         logger.warning(f"Failed to remove bot from {room_name}: {e}")
         raise HTTPException(status_code=404, detail="Bot not found in room")
-    finally:
-        await lk_api.aclose()
 
     logger.info(f"Removed bot from room: {room_name}")
     return {"status": "removed"}
@@ -366,55 +594,197 @@ async def remove_bot(room_name: str, req: BotControlRequest):
 # ── Document Storage ──────────────────────────────────────────────────
 
 
+# Each doc is a single <filename>.md whose first line is an HTML comment
+# holding its metadata, so one file (and one open/read) carries both. Every
+# read path strips that line before returning content. Docs written before
+# this format have a sibling .meta.json and no header; they are still read.
+_DOC_HEADER_PREFIX = b"<!--meta:"
+_DOC_HEADER_SUFFIX = b"-->\n"
+_DOC_HEADER_READ_SIZE = 512
+_DOC_STREAM_CHUNK_SIZE = 64 * 1024
+
+# Doc listings per room, keyed on the directory's mtime. Every upload lands
+# via rename (see _write_doc_file), which changes that mtime, so a write from
+# any worker invalidates the listing. The mtime is read before the scan, so a
+# write racing the scan just forces a rescan on the next call. LRU-capped like
+# the agenda cache so a long-lived worker doesn't keep every room it has seen.
+_DOCS_CACHE_MAX = 256
+_docs_cache: OrderedDict[str, tuple[int, list[dict]]] = OrderedDict()
+
+
+def _encode_doc_header(meta: dict) -> bytes:
+    # ">" only occurs inside JSON strings, so escaping it keeps a title
+    # containing "-->" from closing the comment early.
+    payload = orjson.dumps(meta).replace(b">", b"\\u003e")
+    return _DOC_HEADER_PREFIX + payload + _DOC_HEADER_SUFFIX
+
+
+def _split_doc_header(data: bytes) -> tuple[dict | None, bytes]:
+    """Split a doc file into (metadata, markdown body); metadata is None for legacy docs."""
+    if not data.startswith(_DOC_HEADER_PREFIX):
+        return None, data
+    newline = data.find(b"\n")
+    if newline == -1 or not data[: newline + 1].endswith(_DOC_HEADER_SUFFIX):
+        return None, data
+    meta = orjson.loads(data[len(_DOC_HEADER_PREFIX) : newline + 1 - len(_DOC_HEADER_SUFFIX)])
+    return meta, data[newline + 1 :]
+
+
+def _read_doc_meta(path: str) -> dict | None:
+    """Read only the header line of a doc, falling back to a legacy .meta.json."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        head = os.read(fd, _DOC_HEADER_READ_SIZE)
+        # Long titles can push the header past the first read
+        while head.startswith(_DOC_HEADER_PREFIX) and b"\n" not in head:
+            more = os.read(fd, _DOC_HEADER_READ_SIZE)
+            if not more:
+                break
+            head += more
+    finally:
+        os.close(fd)
+    meta, _ = _split_doc_header(head)
+    if meta is not None:
+        return meta
+    legacy_meta = Path(path).with_suffix(".meta.json")
+    if legacy_meta.exists():
+        return orjson.loads(legacy_meta.read_bytes())
+    return None
+
+
+def _write_doc_file(path: Path, data: bytes) -> None:
+    """Atomically write a doc: temp file in the same directory, then rename.
+
+    Readers never see a partial file, and the rename always bumps the
+    directory mtime, which is what invalidates _docs_cache in every worker.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Leading dot and .tmp suffix keep it out of list_docs' "*.md" scan
+    tmp_path = path.parent / f".{path.name}.{secrets.token_hex(4)}.tmp"
+    # Raw fd write: the data is already bytes, so skip Python's buffered IO
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    try:
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view) :]
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
 @app.post("/api/rooms/{room_id}/docs", status_code=201)
 async def upload_doc(room_id: str, req: UploadDocRequest):
     """Agent uploads a generated markdown document."""
     path = _safe_doc_path(room_id, req.filename)
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(req.content, encoding="utf-8")
-    meta_path = path.with_suffix(".meta.json")
+    content_bytes = req.content.encode("utf-8")
     meta = {
         "filename": req.filename,
         "title": req.title,
-        "size_bytes": len(req.content.encode("utf-8")),
-        "created_at": datetime.now(timezone.utc).isoformat(),
+        "size_bytes": len(content_bytes),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
     }
-    meta_path.write_text(json.dumps(meta), encoding="utf-8")
+    # Disk writes run in the threadpool so a slow volume doesn't stall the loop
+    await asyncio.to_thread(_write_doc_file, path, _encode_doc_header(meta) + content_bytes)
+    _docs_cache.pop(room_id, None)
     logger.info("Stored doc %s for room %s", req.filename, room_id)
     return {"ok": True}
 
 
 @app.get("/api/rooms/{room_id}/docs")
-async def list_docs(room_id: str) -> list[DocMeta]:
+async def list_docs(room_id: str):
     """List all available documents for a room."""
     room_dir = _safe_room_dir(room_id)
-    if not room_dir.exists():
+    try:
+        mtime_ns = room_dir.stat().st_mtime_ns
+    except FileNotFoundError:
         return []
+    cached = _docs_cache.get(room_id)
+    if cached is not None and cached[0] == mtime_ns:
+        _docs_cache.move_to_end(room_id)
+        return cached[1]
+
+    with os.scandir(room_dir) as entries:
+        doc_paths = sorted(e.path for e in entries if e.name.endswith(".md"))
     docs = []
-    for meta_path in sorted(room_dir.glob("*.meta.json")):
+    for doc_path in doc_paths:
         try:
-            meta = json.loads(meta_path.read_text(encoding="utf-8"))
-            docs.append(DocMeta(**meta))
+            # Metadata is written by upload_doc, so it goes out as-is
+            # rather than through a pydantic model and re-validation.
+            meta = _read_doc_meta(doc_path)
+            if meta is not None:
+                docs.append(meta)
         except Exception:
-            logger.warning("Could not read meta file %s", meta_path)
+            logger.warning("Could not read doc metadata for %s", doc_path)
+    _docs_cache[room_id] = (mtime_ns, docs)
+    _docs_cache.move_to_end(room_id)
+    if len(_docs_cache) > _DOCS_CACHE_MAX:
+        _docs_cache.popitem(last=False)
     return docs
 
 
-@app.get("/api/rooms/{room_id}/docs/{filename}")
-async def get_doc(room_id: str, filename: str) -> dict:
-    """Fetch the raw markdown content of a specific document."""
-    path = _safe_doc_path(room_id, filename)
-    if not path.exists():
-        raise HTTPException(status_code=404, detail="Document not found")
-    content = path.read_text(encoding="utf-8")
+def _read_doc(path: Path, filename: str) -> tuple[str, bytes]:
+    """Read a doc's title and markdown body. Blocking; callers use a thread."""
+    data = path.read_bytes()
+    try:
+        meta, body = _split_doc_header(data)
+    except orjson.JSONDecodeError:
+        # Same tolerance as list_docs: log it and still serve the body
+        logger.warning("Could not read doc metadata for %s", path)
+        return filename, data.partition(b"\n")[2]
+    if meta is not None:
+        title = meta.get("title", filename) if isinstance(meta, dict) else filename
+        return title, body
     meta_path = path.with_suffix(".meta.json")
-    title = filename
     if meta_path.exists():
         try:
-            title = json.loads(meta_path.read_text(encoding="utf-8"))["title"]
+            return orjson.loads(meta_path.read_bytes())["title"], body
         except Exception:
             pass
-    return {"filename": filename, "title": title, "content": content}
+    return filename, body
+
+
+@app.get("/api/rooms/{room_id}/docs/{filename}")
+async def get_doc(room_id: str, filename: str):
+    """Fetch the raw markdown content of a specific document."""
+    path = _safe_doc_path(room_id, filename)
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Document not found")
+    title, body = await asyncio.to_thread(_read_doc, path, filename)
+    return {"filename": filename, "title": title, "content": body.decode("utf-8")}
+
+
+def _iter_doc_body(path: Path) -> Iterator[bytes]:
+    """Yield a doc's markdown body in chunks, skipping its metadata header line."""
+    with open(path, "rb") as f:
+        head = f.read(len(_DOC_HEADER_PREFIX))
+        if head == _DOC_HEADER_PREFIX:
+            # Same rule as _split_doc_header: a first line that doesn't end
+            # like a header is ordinary content and is served as-is.
+            line = head + f.readline()
+            if not line.endswith(_DOC_HEADER_SUFFIX):
+                yield line
+        elif head:
+            yield head
+        while chunk := f.read(_DOC_STREAM_CHUNK_SIZE):
+            yield chunk
+
+
+@app.get("/api/rooms/{room_id}/docs/{filename}/raw")
+async def get_doc_raw(room_id: str, filename: str) -> StreamingResponse:
+    """Stream the markdown as uploaded, as text/markdown.
+
+    The header line is skipped, so the body matches get_doc's content and the
+    stored size_bytes. The generator is synchronous, so Starlette runs its
+    reads in the threadpool and only one chunk is in memory at a time.
+    """
+    path = _safe_doc_path(room_id, filename)
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="Document not found")
+    return StreamingResponse(_iter_doc_body(path), media_type="text/markdown; charset=utf-8")
 
 
 # ── Health Check ─────────────────────────────────────────────────────
@@ -428,4 +798,14 @@ async def health():
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Multiple workers need an import string; per-worker caches (agenda,
+    # room metadata, docs) simply warm up independently.
+    uvicorn.run(
+        "main:app",
+        app_dir=str(Path(__file__).resolve().parent),
+        host="0.0.0.0",
+        port=8000,
+        workers=int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1)),
+        loop="uvloop",
+        http="httptools",
+    )
@@ -0,0 +1,201 @@
+import asyncio
+import importlib.util
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if SERVER_DIR not in sys.path:
+    sys.path.insert(0, SERVER_DIR)
+
+# Loaded under its own name so it can't collide with agent/main.py when both
+# test suites run in one process; shared across the server test modules.
+try:
+    server_main = sys.modules.get("server_main")
+    if server_main is None:
+        _spec = importlib.util.spec_from_file_location("server_main", os.path.join(SERVER_DIR, "main.py"))
+        server_main = importlib.util.module_from_spec(_spec)
+        _spec.loader.exec_module(server_main)
+        sys.modules["server_main"] = server_main
+except ModuleNotFoundError as exc:  # pragma: no cover - env-dependent
+    server_main = None
+    MAIN_IMPORT_ERROR = exc
+else:
+    MAIN_IMPORT_ERROR = None
+
+
+def _chunk(content):
+    """A stream event shaped like mistralai's; None means an empty choices list."""
+    choices = [] if content is None else [SimpleNamespace(delta=SimpleNamespace(content=content))]
+    return SimpleNamespace(data=SimpleNamespace(choices=choices))
+
+
+class _FakeStream:
+    """Async context manager + iterator standing in for chat.stream_async's result."""
+
+    def __init__(self, deltas, delay: float = 0.0):
+        self.deltas = deltas
+        self.delay = delay
+        self.consumed = 0
+        self.closed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.closed = True
+        return False
+
+    def __aiter__(self):
+        return self._events()
+
+    async def _events(self):
+        for delta in self.deltas:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            self.consumed += 1
+            yield _chunk(delta)
+
+
+def _fake_mistral(*streams):
+    """A mistral_client stub whose stream_async returns the given streams in order."""
+    return SimpleNamespace(chat=SimpleNamespace(stream_async=AsyncMock(side_effect=list(streams))))
+
+
+def _scan_chunks(chunks: list[str]) -> str | None:
+    """Feed chunks through _scan_json_object the way the stream loop does."""
+    state = [0, False, False, False]
+    parts = []
+    for chunk in chunks:
+        end = server_main._scan_json_object(chunk, state)
+        if end != -1:
+            parts.append(chunk[:end])
+            return "".join(parts)
+        parts.append(chunk)
+    return None
+
+
+@unittest.skipUnless(server_main is not None, f"main import unavailable: {MAIN_IMPORT_ERROR}")
+class TestScanJsonObject(unittest.TestCase):
+    def test_stops_at_closing_brace_of_top_level_object(self):
+        self.assertEqual(_scan_chunks(['{"a": {"b": 1}} trailing']), '{"a": {"b": 1}}')
+
+    def test_ignores_braces_inside_strings(self):
+        text = '{"title": "Plan {Q3} }}", "items": []}'
+        self.assertEqual(_scan_chunks([text + "\n"]), text)
+
+    def test_ignores_escaped_quotes_inside_strings(self):
+        text = '{"title": "say \\"}\\" twice", "n": 1}'
+        self.assertEqual(_scan_chunks([text]), text)
+
+    def test_escaped_backslash_does_not_swallow_closing_quote(self):
+        text = '{"path": "C:\\\\", "n": {}}'
+        self.assertEqual(_scan_chunks([text + "xyz"]), text)
+
+    def test_state_carries_across_split_chunks(self):
+        text = '{"title": "a } b \\" c", "items": [{"d": 5}]}'
+        # Split at every offset, including inside strings and escapes
+        for cut in range(1, len(text)):
+            with self.subTest(cut=cut):
+                self.assertEqual(_scan_chunks([text[:cut], text[cut:] + " tail"]), text)
+
+    def test_incomplete_object_returns_none(self):
+        self.assertIsNone(_scan_chunks(['{"a": ', '"}"']))
+
+
+@unittest.skipUnless(server_main is not None, f"main import unavailable: {MAIN_IMPORT_ERROR}")
+class TestCallMistralForAgenda(unittest.IsolatedAsyncioTestCase):
+    async def test_stops_reading_once_object_closes(self):
+        stream = _FakeStream(['{"title": "T", ', '"items": []}', " trailing", " more"])
+        with patch.object(server_main, "mistral_client", _fake_mistral(stream)):
+            agenda = await server_main._call_mistral_for_agenda("standup", 15)
+        self.assertEqual(agenda, {"title": "T", "items": []})
+        self.assertEqual(stream.consumed, 2)
+        self.assertTrue(stream.closed)
+
+    async def test_skips_chunks_without_choices_or_content(self):
+        stream = _FakeStream([None, '{"title": ', None, "", '"T"}'])
+        with patch.object(server_main, "mistral_client", _fake_mistral(stream)):
+            agenda = await server_main._call_mistral_for_agenda("standup", 15)
+        self.assertEqual(agenda, {"title": "T"})
+
+    async def test_truncated_stream_raises_decode_error(self):
+        stream = _FakeStream(['{"title": "T"'])
+        with patch.object(server_main, "mistral_client", _fake_mistral(stream)):
+            with self.assertRaises(server_main.orjson.JSONDecodeError):
+                await server_main._call_mistral_for_agenda("standup", 15)
+
+
+@unittest.skipUnless(server_main is not None, f"main import unavailable: {MAIN_IMPORT_ERROR}")
+class TestAgendaInflightCoalescing(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        key_patch = patch.object(server_main, "_MISTRAL_API_KEY", "test-key")
+        key_patch.start()
+        self.addCleanup(key_patch.stop)
+        for state in (server_main._agenda_cache, server_main._agenda_inflight):
+            state.clear()
+            self.addCleanup(state.clear)
+
+    def _request(self, description: str = "weekly standup", duration: int = 15):
+        return server_main.AgendaRequest(description=description, duration_minutes=duration)
+
+    async def test_concurrent_identical_requests_share_one_call(self):
+        fake = _fake_mistral(_FakeStream(['{"title": "Standup"}'], delay=0.01))
+        with patch.object(server_main, "mistral_client", fake):
+            results = await asyncio.gather(
+                *(server_main.generate_agenda(self._request()) for _ in range(5))
+            )
+        self.assertEqual(fake.chat.stream_async.await_count, 1)
+        self.assertEqual(results, [{"title": "Standup"}] * 5)
+        await asyncio.sleep(0)  # let the done callback run
+        self.assertEqual(server_main._agenda_inflight, {})
+        self.assertEqual(len(server_main._agenda_cache), 1)
+
+    async def test_different_requests_are_not_coalesced(self):
+        fake = _fake_mistral(_FakeStream(['{"title": "A"}']), _FakeStream(['{"title": "B"}']))
+        with patch.object(server_main, "mistral_client", fake):
+            results = await asyncio.gather(
+                server_main.generate_agenda(self._request("standup")),
+                server_main.generate_agenda(self._request("retro")),
+            )
+        self.assertEqual(fake.chat.stream_async.await_count, 2)
+        self.assertCountEqual([r["title"] for r in results], ["A", "B"])
+
+    async def test_cancelled_waiter_does_not_cancel_shared_generation(self):
+        fake = _fake_mistral(_FakeStream(['{"title": ', '"Standup"}'], delay=0.02))
+        with patch.object(server_main, "mistral_client", fake):
+            first = asyncio.create_task(server_main.generate_agenda(self._request()))
+            second = asyncio.create_task(server_main.generate_agenda(self._request()))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            self.assertEqual(await second, {"title": "Standup"})
+        with self.assertRaises(asyncio.CancelledError):
+            await first
+        self.assertEqual(fake.chat.stream_async.await_count, 1)
+
+    async def test_failure_reaches_every_waiter_and_is_not_cached(self):
+        stream_async = AsyncMock(side_effect=[RuntimeError("upstream down"), _FakeStream(['{"title": "T"}'])])
+        fake = SimpleNamespace(chat=SimpleNamespace(stream_async=stream_async))
+        with patch.object(server_main, "mistral_client", fake):
+            results = await asyncio.gather(
+                server_main.generate_agenda(self._request()),
+                server_main.generate_agenda(self._request()),
+                return_exceptions=True,
+            )
+            for result in results:
+                self.assertIsInstance(result, server_main.HTTPException)
+                self.assertEqual(result.status_code, 502)
+            await asyncio.sleep(0)
+            self.assertEqual(server_main._agenda_inflight, {})
+            self.assertEqual(server_main._agenda_cache, {})
+
+            # The next request starts a fresh generation rather than reusing the failure
+            self.assertEqual(await server_main.generate_agenda(self._request()), {"title": "T"})
+        self.assertEqual(stream_async.await_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,238 @@
+import importlib.util
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if SERVER_DIR not in sys.path:
+    sys.path.insert(0, SERVER_DIR)
+
+# Loaded under its own name so it can't collide with agent/main.py when both
+# test suites run in one process; shared across the server test modules.
+try:
+    server_main = sys.modules.get("server_main")
+    if server_main is None:
+        _spec = importlib.util.spec_from_file_location("server_main", os.path.join(SERVER_DIR, "main.py"))
+        server_main = importlib.util.module_from_spec(_spec)
+        _spec.loader.exec_module(server_main)
+        sys.modules["server_main"] = server_main
+except ModuleNotFoundError as exc:  # pragma: no cover - env-dependent
+    server_main = None
+    MAIN_IMPORT_ERROR = exc
+else:
+    MAIN_IMPORT_ERROR = None
+
+try:
+    from fastapi.testclient import TestClient
+except (ImportError, RuntimeError):  # pragma: no cover - needs httpx
+    TestClient = None
+
+
+ROOM_ID = "meet-0123abcd"
+
+
+@unittest.skipUnless(server_main is not None, f"main import unavailable: {MAIN_IMPORT_ERROR}")
+class TestDocHeader(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _write(self, meta: dict, body: bytes = b"# Notes\n") -> Path:
+        path = self.dir / "notes.md"
+        server_main._write_doc_file(path, server_main._encode_doc_header(meta) + body)
+        return path
+
+    def test_round_trip(self):
+        meta = {"title": "Notes", "created_at": "2026-01-01T00:00:00+00:00"}
+        path = self._write(meta)
+        self.assertEqual(server_main._split_doc_header(path.read_bytes()), (meta, b"# Notes\n"))
+        self.assertEqual(server_main._read_doc_meta(str(path)), meta)
+
+    def test_title_containing_comment_terminator(self):
+        meta = {"title": "a --> b -->"}
+        header = server_main._encode_doc_header(meta)
+        # Only the real terminator may appear, at the very end
+        self.assertEqual(header.count(b"-->"), 1)
+        self.assertTrue(header.endswith(b"-->\n"))
+        self.assertEqual(server_main._read_doc_meta(str(self._write(meta))), meta)
+
+    def test_title_containing_newlines(self):
+        meta = {"title": "line one\nline two\r\n"}
+        header = server_main._encode_doc_header(meta)
+        self.assertEqual(header.count(b"\n"), 1)
+        path = self._write(meta, b"body\n")
+        self.assertEqual(server_main._split_doc_header(path.read_bytes()), (meta, b"body\n"))
+
+    def test_header_longer_than_first_read(self):
+        meta = {"title": "x" * (server_main._DOC_HEADER_READ_SIZE * 3)}
+        path = self._write(meta)
+        self.assertEqual(server_main._read_doc_meta(str(path)), meta)
+
+    def test_legacy_doc_uses_meta_json(self):
+        path = self.dir / "old.md"
+        path.write_bytes(b"# Old doc\n")
+        (self.dir / "old.meta.json").write_bytes(b'{"title": "Old"}')
+        self.assertEqual(server_main._split_doc_header(path.read_bytes()), (None, b"# Old doc\n"))
+        self.assertEqual(server_main._read_doc_meta(str(path)), {"title": "Old"})
+
+    def test_legacy_doc_without_meta_json(self):
+        path = self.dir / "bare.md"
+        path.write_bytes(b"<!-- just a comment -->\ntext\n")
+        self.assertIsNone(server_main._read_doc_meta(str(path)))
+
+    def test_write_leaves_no_temp_files(self):
+        self._write({"title": "Notes"})
+        self.assertEqual(sorted(p.name for p in self.dir.iterdir()), ["notes.md"])
+
+
+class _DocsTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        data_dir_patch = patch.object(server_main, "_DATA_DIR", Path(self._tmp.name))
+        data_dir_patch.start()
+        self.addCleanup(data_dir_patch.stop)
+        server_main._docs_cache.clear()
+        self.addCleanup(server_main._docs_cache.clear)
+
+    async def _upload(self, filename: str, title: str = "Notes", content: str = "# Notes\n", room_id: str = ROOM_ID):
+        req = server_main.UploadDocRequest(filename=filename, title=title, content=content)
+        return await server_main.upload_doc(room_id, req)
+
+
+@unittest.skipUnless(server_main is not None, f"main import unavailable: {MAIN_IMPORT_ERROR}")
+class TestDocsListingCache(_DocsTestCase):
+    async def test_unknown_room_lists_nothing(self):
+        self.assertEqual(await server_main.list_docs(ROOM_ID), [])
+        self.assertNotIn(ROOM_ID, server_main._docs_cache)
+
+    async def test_unchanged_room_is_served_from_cache(self):
+        await self._upload("a.md")
+        first = await server_main.list_docs(ROOM_ID)
+        with patch.object(server_main, "_read_doc_meta") as read_meta:
+            second = await server_main.list_docs(ROOM_ID)
+        read_meta.assert_not_called()
+        self.assertIs(second, first)
+
+    async def test_upload_invalidates_listing(self):
+        await self._upload("a.md", title="First")
+        self.assertEqual([d["title"] for d in await server_main.list_docs(ROOM_ID)], ["First"])
+
+        await self._upload("b.md", title="Second")
+        self.assertEqual(
+            [d["title"] for d in await server_main.list_docs(ROOM_ID)], ["First", "Second"]
+        )
+
+    async def test_overwrite_invalidates_listing(self):
+        await self._upload("a.md", content="short")
+        await server_main.list_docs(ROOM_ID)
+        await self._upload("a.md", content="much longer content")
+        (doc,) = await server_main.list_docs(ROOM_ID)
+        self.assertEqual(doc["size_bytes"], len("much longer content"))
+
+    async def test_cache_is_lru_bounded(self):
+        rooms = [f"meet-{i:08x}" for i in range(3)]
+        for room_id in rooms:
+            await self._upload("a.md", room_id=room_id)
+        with patch.object(server_main, "_DOCS_CACHE_MAX", 2):
+            await server_main.list_docs(rooms[0])
+            await server_main.list_docs(rooms[1])
+            # Touch the oldest so the middle one becomes least recently used
+            await server_main.list_docs(rooms[0])
+            await server_main.list_docs(rooms[2])
+        self.assertEqual(list(server_main._docs_cache), [rooms[0], rooms[2]])
+
+
+@unittest.skipUnless(server_main is not None, f"main import unavailable: {MAIN_IMPORT_ERROR}")
+class TestGetDoc(_DocsTestCase):
+    def _room_dir(self) -> Path:
+        room_dir = Path(self._tmp.name) / "rooms" / ROOM_ID
+        room_dir.mkdir(parents=True, exist_ok=True)
+        return room_dir
+
+    async def test_returns_title_and_body_without_header(self):
+        await self._upload("a.md", title="Notes --> v2", content="# Body\n")
+        doc = await server_main.get_doc(ROOM_ID, "a.md")
+        self.assertEqual(doc, {"filename": "a.md", "title": "Notes --> v2", "content": "# Body\n"})
+
+    async def test_corrupt_header_falls_back_to_filename(self):
+        (self._room_dir() / "a.md").write_bytes(b"<!--meta:{not json-->\n# Body\n")
+        doc = await server_main.get_doc(ROOM_ID, "a.md")
+        self.assertEqual(doc["title"], "a.md")
+        self.assertEqual(doc["content"], "# Body\n")
+
+    async def test_legacy_doc_title_comes_from_meta_json(self):
+        room_dir = self._room_dir()
+        (room_dir / "old.md").write_bytes(b"# Old doc\n")
+        (room_dir / "old.meta.json").write_bytes(b'{"title": "Old"}')
+        doc = await server_main.get_doc(ROOM_ID, "old.md")
+        self.assertEqual(doc["title"], "Old")
+        self.assertEqual(doc["content"], "# Old doc\n")
+
+    async def test_missing_doc_is_404(self):
+        with self.assertRaises(server_main.HTTPException) as ctx:
+            await server_main.get_doc(ROOM_ID, "nope.md")
+        self.assertEqual(ctx.exception.status_code, 404)
+
+
+@unittest.skipUnless(server_main is not None, f"main import unavailable: {MAIN_IMPORT_ERROR}")
+class TestGetDocRaw(_DocsTestCase):
+    async def _raw_body(self, filename: str) -> bytes:
+        response = await server_main.get_doc_raw(ROOM_ID, filename)
+        self.assertEqual(response.media_type, "text/markdown; charset=utf-8")
+        return b"".join([chunk async for chunk in response.body_iterator])
+
+    async def test_streams_body_without_header(self):
+        content = "# Big\n" + "line of text\n" * 20000
+        await self._upload("a.md", content=content)
+        with patch.object(server_main, "_DOC_STREAM_CHUNK_SIZE", 4096):
+            chunks = list(server_main._iter_doc_body(server_main._safe_doc_path(ROOM_ID, "a.md")))
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(c) <= 4096 for c in chunks))
+        self.assertEqual(await self._raw_body("a.md"), content.encode())
+
+    async def test_legacy_doc_is_served_whole(self):
+        room_dir = Path(self._tmp.name) / "rooms" / ROOM_ID
+        room_dir.mkdir(parents=True)
+        (room_dir / "old.md").write_bytes(b"<!--meta: not a header\n# Old\n")
+        self.assertEqual(await self._raw_body("old.md"), b"<!--meta: not a header\n# Old\n")
+
+    async def test_empty_doc(self):
+        await self._upload("a.md", content="")
+        self.assertEqual(await self._raw_body("a.md"), b"")
+
+    async def test_missing_doc_is_404(self):
+        with self.assertRaises(server_main.HTTPException) as ctx:
+            await server_main.get_doc_raw(ROOM_ID, "nope.md")
+        self.assertEqual(ctx.exception.status_code, 404)
+
+
+@unittest.skipUnless(server_main is not None and TestClient is not None, "TestClient (httpx) unavailable")
+class TestRawDocsSkipGzip(_DocsTestCase):
+    def test_raw_route_is_not_gzipped_but_json_route_is(self):
+        content = "compressible text\n" * 500
+        client = TestClient(server_main.app)
+        self.assertEqual(
+            client.post(
+                f"/api/rooms/{ROOM_ID}/docs",
+                json={"filename": "a.md", "title": "A", "content": content},
+            ).status_code,
+            201,
+        )
+        headers = {"Accept-Encoding": "gzip"}
+        raw = client.get(f"/api/rooms/{ROOM_ID}/docs/a.md/raw", headers=headers)
+        self.assertNotIn("content-encoding", raw.headers)
+        self.assertEqual(raw.text, content)
+        doc = client.get(f"/api/rooms/{ROOM_ID}/docs/a.md", headers=headers)
+        self.assertEqual(doc.headers.get("content-encoding"), "gzip")
+
+
+if __name__ == "__main__":
+    unittest.main()
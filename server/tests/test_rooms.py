@@ -0,0 +1,202 @@
+import importlib.util
+import os
+import re
+import sys
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if SERVER_DIR not in sys.path:
+    sys.path.insert(0, SERVER_DIR)
+
+# Loaded under its own name so it can't collide with agent/main.py when both
+# test suites run in one process; shared across the server test modules.
+try:
+    server_main = sys.modules.get("server_main")
+    if server_main is None:
+        _spec = importlib.util.spec_from_file_location("server_main", os.path.join(SERVER_DIR, "main.py"))
+        server_main = importlib.util.module_from_spec(_spec)
+        _spec.loader.exec_module(server_main)
+        sys.modules["server_main"] = server_main
+except ModuleNotFoundError as exc:  # pragma: no cover - env-dependent
+    server_main = None
+    MAIN_IMPORT_ERROR = exc
+else:
+    MAIN_IMPORT_ERROR = None
+
+
+@unittest.skipUnless(server_main is not None, f"main import unavailable: {MAIN_IMPORT_ERROR}")
+class TestGenerateAccessCode(unittest.TestCase):
+    def test_format(self):
+        for _ in range(200):
+            self.assertRegex(server_main.generate_access_code(), re.compile(r"MEET-[A-Z0-9]{4}\Z"))
+
+    def test_covers_code_space_endpoints(self):
+        with patch.object(server_main.secrets, "randbelow", return_value=0):
+            self.assertEqual(server_main.generate_access_code(), "MEET-AAAA")
+        with patch.object(server_main.secrets, "randbelow", return_value=server_main._CODE_SPACE - 1):
+            self.assertEqual(server_main.generate_access_code(), "MEET-9999")
+
+    def test_digits_are_little_endian_base_36(self):
+        # n = 1 + 2*36 + 3*36^2 + 4*36^3 -> indices 1, 2, 3, 4 -> "BCDE"
+        n = 1 + 2 * 36 + 3 * 36**2 + 4 * 36**3
+        with patch.object(server_main.secrets, "randbelow", return_value=n):
+            self.assertEqual(server_main.generate_access_code(), "MEET-BCDE")
+
+
+def _room(metadata: dict | str):
+    if isinstance(metadata, dict):
+        metadata = server_main.orjson.dumps(metadata).decode()
+    return SimpleNamespace(metadata=metadata)
+
+
+class _FakeLiveKit:
+    """Minimal LiveKitAPI stand-in; ``rooms`` maps room name -> metadata."""
+
+    def __init__(self, rooms: dict):
+        self.rooms = rooms
+        self.room = SimpleNamespace(
+            list_rooms=AsyncMock(side_effect=self._list_rooms),
+            list_participants=AsyncMock(return_value=SimpleNamespace(participants=[])),
+            update_room_metadata=AsyncMock(side_effect=self._update_room_metadata),
+        )
+        self.agent_dispatch = SimpleNamespace(create_dispatch=AsyncMock())
+
+    async def _list_rooms(self, req):
+        return SimpleNamespace(rooms=[_room(self.rooms[n]) for n in req.names if n in self.rooms])
+
+    async def _update_room_metadata(self, req):
+        self.rooms[req.room] = req.metadata
+
+
+class _RoomMetaTestCase(unittest.IsolatedAsyncioTestCase):
+    ROOM = "meet-0123abcd"
+    META = {"access_code": "MEET-AB12", "host_token": "host-secret", "style": "gentle"}
+
+    def setUp(self):
+        self.lk = _FakeLiveKit({self.ROOM: dict(self.META)})
+        # Swap only main's view of the clock; asyncio keeps the real one
+        self.now = 1000.0
+        for target, value in (
+            ("_get_lk_api", lambda: self.lk),
+            ("time", SimpleNamespace(monotonic=lambda: self.now)),
+            ("_LK_KEY", "test-key"),
+            ("_LK_SECRET", "test-secret-test-secret-test-secret"),
+        ):
+            p = patch.object(server_main, target, value)
+            p.start()
+            self.addCleanup(p.stop)
+        server_main._room_meta_cache.clear()
+        self.addCleanup(server_main._room_meta_cache.clear)
+
+    @property
+    def list_rooms(self) -> AsyncMock:
+        return self.lk.room.list_rooms
+
+
+@unittest.skipUnless(server_main is not None, f"main import unavailable: {MAIN_IMPORT_ERROR}")
+class TestRoomMetaCache(_RoomMetaTestCase):
+    async def test_repeat_lookups_within_ttl_hit_cache(self):
+        first = await server_main._get_room_meta(self.ROOM)
+        self.now += server_main._ROOM_META_TTL - 0.1
+        second = await server_main._get_room_meta(self.ROOM)
+        self.assertIs(second, first)
+        self.assertEqual(first.access_code, "MEET-AB12")
+        self.assertEqual(self.list_rooms.await_count, 1)
+
+    async def test_expired_entry_is_refetched(self):
+        await server_main._get_room_meta(self.ROOM)
+        self.lk.rooms[self.ROOM]["style"] = "moderate"
+        self.now += server_main._ROOM_META_TTL
+        meta = await server_main._get_room_meta(self.ROOM)
+        self.assertEqual(meta.style, "moderate")
+        self.assertEqual(self.list_rooms.await_count, 2)
+
+    async def test_expired_entries_for_other_rooms_are_swept(self):
+        other = "meet-89abcdef"
+        self.lk.rooms[other] = {}
+        await server_main._get_room_meta(other)
+        self.now += server_main._ROOM_META_TTL
+        await server_main._get_room_meta(self.ROOM)
+        self.assertEqual(list(server_main._room_meta_cache), [self.ROOM])
+
+    async def test_ended_room_returns_none_and_drops_entry(self):
+        await server_main._get_room_meta(self.ROOM)
+        del self.lk.rooms[self.ROOM]
+        self.now += server_main._ROOM_META_TTL
+        self.assertIsNone(await server_main._get_room_meta(self.ROOM))
+        self.assertNotIn(self.ROOM, server_main._room_meta_cache)
+
+    async def test_token_burst_costs_one_list_rooms(self):
+        for name in ("alice", "bob", "carol"):
+            req = server_main.TokenRequest(room_name=self.ROOM, participant_name=name, access_code="meet-ab12")
+            self.assertIn("token", await server_main.generate_token(req))
+        self.assertEqual(self.list_rooms.await_count, 1)
+
+    async def test_token_with_wrong_code_is_rejected(self):
+        req = server_main.TokenRequest(room_name=self.ROOM, participant_name="eve", access_code="MEET-XXXX")
+        with self.assertRaises(server_main.HTTPException) as ctx:
+            await server_main.generate_token(req)
+        self.assertEqual(ctx.exception.status_code, 403)
+
+
+@unittest.skipUnless(server_main is not None, f"main import unavailable: {MAIN_IMPORT_ERROR}")
+class TestRoomMetaWrites(_RoomMetaTestCase):
+    def _bot_request(self, host_token: str = "host-secret"):
+        return server_main.BotControlRequest(host_token=host_token)
+
+    async def test_invite_bot_keeps_unknown_keys(self):
+        self.lk.rooms[self.ROOM]["added_by_agent"] = {"phase": 2}
+        self.assertEqual(await server_main.invite_bot(self.ROOM, self._bot_request()), {"status": "invited"})
+        stored = server_main.orjson.loads(self.lk.rooms[self.ROOM])
+        self.assertEqual(stored, {**self.META, "added_by_agent": {"phase": 2}, "invite_bot": True})
+        self.lk.agent_dispatch.create_dispatch.assert_awaited_once()
+
+    async def test_invite_bot_reads_fresh_metadata_and_invalidates_cache(self):
+        await server_main._get_room_meta(self.ROOM)
+        # Another writer changes the room inside the cache TTL
+        self.lk.rooms[self.ROOM]["style"] = "chatting"
+        await server_main.invite_bot(self.ROOM, self._bot_request())
+        self.assertEqual(server_main.orjson.loads(self.lk.rooms[self.ROOM])["style"], "chatting")
+        self.assertNotIn(self.ROOM, server_main._room_meta_cache)
+        meta = await server_main._get_room_meta(self.ROOM)
+        self.assertTrue(meta.invite_bot)
+        self.assertEqual(meta.style, "chatting")
+
+    async def test_invite_bot_skips_update_when_already_enabled(self):
+        self.lk.rooms[self.ROOM]["invite_bot"] = True
+        await server_main.invite_bot(self.ROOM, self._bot_request())
+        self.lk.room.update_room_metadata.assert_not_awaited()
+        self.lk.agent_dispatch.create_dispatch.assert_awaited_once()
+
+    async def test_invite_bot_when_bot_present_changes_nothing(self):
+        self.lk.room.list_participants.return_value = SimpleNamespace(
+            participants=[SimpleNamespace(identity="beat-facilitator")]
+        )
+        result = await server_main.invite_bot(self.ROOM, self._bot_request())
+        self.assertEqual(result, {"status": "already_active"})
+        self.lk.room.update_room_metadata.assert_not_awaited()
+        self.lk.agent_dispatch.create_dispatch.assert_not_awaited()
+
+    async def test_wrong_host_token_is_rejected(self):
+        with self.assertRaises(server_main.HTTPException) as ctx:
+            await server_main.invite_bot(self.ROOM, self._bot_request("nope"))
+        self.assertEqual(ctx.exception.status_code, 403)
+        self.lk.room.update_room_metadata.assert_not_awaited()
+
+    async def test_malformed_metadata_is_502(self):
+        for metadata in ("{not json", '{"access_code": 5}', "[]"):
+            with self.subTest(metadata=metadata):
+                server_main._room_meta_cache.clear()
+                self.lk.rooms[self.ROOM] = metadata
+                req = server_main.TokenRequest(room_name=self.ROOM, participant_name="a", access_code="MEET-AB12")
+                with self.assertRaises(server_main.HTTPException) as ctx:
+                    await server_main.generate_token(req)
+                self.assertEqual(ctx.exception.status_code, 502)
+                self.assertEqual(ctx.exception.detail, "Room metadata is malformed")
+
+
+if __name__ == "__main__":
+    unittest.main()